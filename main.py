@@ -2,9 +2,18 @@ import yaml
 import os
 from dlt.helpers.dbt import create_runner
 
-def load_tenants_config():
-    with open("tenants.yaml", "r") as f:
-        return yaml.safe_load(f)
+try:
+    from yaml import CSafeLoader as SafeLoader
+except ImportError:  # PyYAML built without libyaml
+    from yaml import SafeLoader
+
+TENANTS_YAML = "tenants.yaml"
+DBT_PROJECT_DIR = "warehouse/gata_transformation"
+DBT_PROFILES_DIR = os.path.abspath(DBT_PROJECT_DIR)
+
+def load_tenants_config(path=TENANTS_YAML):
+    with open(path, "r") as f:
+        return yaml.load(f, Loader=SafeLoader)
 
 def run_dbt_factory(tenant_configs):
     print(" Auto-Triggering Star Schema Factory via dlt runner (MotherDuck)...")
@@ -14,8 +23,8 @@ def run_dbt_factory(tenant_configs):
         venv=None,          # use current environment (dbt already installed)
         credentials=None,   # skip dlt credential injection — profiles.yml handles it
         working_dir=".",
-        package_location="warehouse/gata_transformation",
-        package_profiles_dir=os.path.abspath("warehouse/gata_transformation"),
+        package_location=DBT_PROJECT_DIR,
+        package_profiles_dir=DBT_PROFILES_DIR,
         package_profile_name="swamp-duck",
     )
     
@@ -1,96 +1,201 @@
 import polars as pl
 import duckdb
+import atexit
+import functools
 import hashlib
 import os
 import sys
+import tempfile
 import yaml
-import subprocess
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
 from pathlib import Path
 from datetime import datetime
+from dbt.cli.main import dbtRunner
+from dotenv import load_dotenv
+
+try:
+    from yaml import CSafeLoader as SafeLoader
+except ImportError:  # PyYAML built without libyaml
+    from yaml import SafeLoader
 
 PROJECT_ROOT = Path(__file__).resolve().parent.parent
 DBT_PROJECT_DIR = PROJECT_ROOT / "warehouse" / "gata_transformation"
 MASTER_MODELS_DIR = DBT_PROJECT_DIR / "models" / "platform" / "master_models"
+SUPPORTED_CONNECTORS_YAML = PROJECT_ROOT / "supported_connectors.yaml"
+SANDBOX_DB_PATH = str(PROJECT_ROOT / "warehouse" / "sandbox.duckdb")
+ENV_FILE = PROJECT_ROOT / ".env"
 sys.path.append(str(PROJECT_ROOT / "services" / "mock-data-engine"))
 
 from orchestrator import MockOrchestrator
 from config import TenantConfig, SourceRegistry, SourceConfig
 
 MASTER_MODEL_TEMPLATE = "{{ generate_master_model() }}\n"
+BLUEPRINT_COLUMNS = (
+    "source_name", "source_table_name", "source_schema_hash",
+    "master_model_id", "version", "registered_at",
+)
+LIBRARY_TABLE_PREFIX = "raw_library_sample_"
+
+# Master model ids whose .sql file is known to exist; many library tables share one
+_ENSURED_MASTER_MODELS = set()
 
 def ensure_master_model_file(master_id: str):
-    """Create the dbt master model .sql file if it doesn't already exist."""
-    MASTER_MODELS_DIR.mkdir(parents=True, exist_ok=True)
+    """Create the dbt master model .sql file if it doesn't already exist. MASTER_MODELS_DIR must exist."""
     model_file = MASTER_MODELS_DIR / f"platform_mm__{master_id}.sql"
+    if master_id in _ENSURED_MASTER_MODELS:
+        return model_file
     if not model_file.exists():
         model_file.write_text(MASTER_MODEL_TEMPLATE)
         print(f"[NEW] Created master model file: platform_mm__{master_id}.sql")
+    _ENSURED_MASTER_MODELS.add(master_id)
     return model_file
 
-def calculate_dlt_schema_hash(dlt_schema: dict, table_name: str) -> str:
-    """Computes a structural hash based on physical columns and types."""
-    table_meta = dlt_schema.get('tables', {}).get(table_name, {})
-    columns = table_meta.get('columns', {})
-    sorted_cols = sorted([(n, str(p.get('data_type'))) for n, p in columns.items() if not n.startswith(("_dlt", "_airbyte"))])
-    signature = "|".join([f"{c}:{t}" for c, t in sorted_cols])
-    return hashlib.md5(signature.encode('utf-8')).hexdigest()
+def calculate_columns_hash(columns: dict) -> str:
+    """Structural hash of one dlt table's columns dict."""
+    # Parts are ordered by column name, not by rendered text, so signatures match the old tuple sort
+    parts = {n: f"{n}:{p.get('data_type')}" for n, p in columns.items() if not n.startswith(("_dlt", "_airbyte"))}
+    return _signature_digest("|".join([parts[n] for n in sorted(parts)]))
+
+@functools.lru_cache(maxsize=1024)
+def _signature_digest(signature: str) -> str:
+    # Tables with the same column layout (across connectors and batches) share one digest
+    # 16-byte BLAKE2b keeps the 32-char hex width of the old MD5 fingerprints
+    return hashlib.blake2b(signature.encode('utf-8'), digest_size=16, usedforsecurity=False).hexdigest()
+
+def calculate_dlt_schema_hashes(dlt_schema: dict) -> dict:
+    """Fingerprints every non-dlt table of one orchestrator run in a single pass."""
+    return {
+        table_name: calculate_columns_hash(table_meta.get('columns', {}))
+        for table_name, table_meta in dlt_schema.get('tables', {}).items()
+        if "_dlt" not in table_name
+    }
+
+# One open connection per warehouse, shared by every caller in the process
+_DB_CONNECTIONS = {}
 
 def get_db_connection(target='dev'):
-    if target in ('sandbox', 'local'):
-        con = duckdb.connect(str(PROJECT_ROOT / "warehouse" / "sandbox.duckdb"))
-        con.sql("CREATE SCHEMA IF NOT EXISTS main")
+    key = 'sandbox' if target in ('sandbox', 'local') else target
+    con = _DB_CONNECTIONS.get(key)
+    if con is not None:
         return con
-    token = os.environ.get("MOTHERDUCK_TOKEN")
-    con = duckdb.connect(f"md:my_db?motherduck_token={token}" if token else "md:my_db")
+    if key == 'sandbox':
+        con = duckdb.connect(SANDBOX_DB_PATH)
+    else:
+        token = os.environ.get("MOTHERDUCK_TOKEN")
+        con = duckdb.connect(f"md:my_db?motherduck_token={token}" if token else "md:my_db")
     con.sql("CREATE SCHEMA IF NOT EXISTS main")
+    _DB_CONNECTIONS[key] = con
     return con
 
+def close_db_connections():
+    """Close cached connections; the sandbox file stays locked to other processes while open."""
+    while _DB_CONNECTIONS:
+        _key, con = _DB_CONNECTIONS.popitem()
+        con.close()
+
+atexit.register(close_db_connections)
+
+def map_connector_dna(connector_def, credentials):
+    """Generate one connector's sample tables on their own and fingerprint them. Runs in a worker process."""
+    source_name = connector_def['name']
+    print(f"[DNA] Mapping DNA for: {source_name}...")
+    dummy_tenant = TenantConfig(slug="library_sample", business_name="Library", sources=SourceRegistry())
+    setattr(dummy_tenant.sources, source_name, SourceConfig(enabled=True))
+
+    # A private dlt working dir per run: parallel runs share the pipeline name, not its state
+    with tempfile.TemporaryDirectory() as pipelines_dir:
+        # INCREASED TO 30 DAYS: Ensures high categorical density for DNA established
+        orch = MockOrchestrator(dummy_tenant, days=30, credentials=credentials, pipelines_dir=pipelines_dir)
+        # Only the inferred dlt schema is fingerprinted; the sample rows are never loaded
+        dlt_schema_dict, _dlt_load_id = orch.run(schema_only=True)
+    return calculate_dlt_schema_hashes(dlt_schema_dict)
+
 def load_connectors_catalog(target='dev'):
+    with open(SUPPORTED_CONNECTORS_YAML, "r") as f:
+        manifest = yaml.load(f, Loader=SafeLoader)
+    connectors = manifest['connectors']
+
+    # One isolated run per connector, so every blueprint comes from that connector alone;
+    # the runs are independent and go to worker processes, results back in manifest order
+    credentials = 'duckdb' if target in ('sandbox', 'local') else 'motherduck'
+    with ProcessPoolExecutor(max_workers=max(1, min(len(connectors), os.cpu_count() or 1))) as pool:
+        connector_hashes = list(pool.map(map_connector_dna, connectors, repeat(credentials)))
+
+    library_tables = []
+    for connector_def, table_hashes in zip(connectors, connector_hashes):
+        prefix = f"{LIBRARY_TABLE_PREFIX}{connector_def['name']}_"
+        for table_name, struct_hash in table_hashes.items():
+            if table_name.startswith(prefix):
+                library_tables.append((connector_def, table_name[len(prefix):], struct_hash))
+
     con = get_db_connection(target)
-    existing_blueprints = []
+    existing_blueprints = None
     try: 
-        existing_blueprints = con.sql("SELECT * FROM main.connector_blueprints").to_df().to_dict('records')
+        existing_blueprints = con.sql(f"SELECT {', '.join(BLUEPRINT_COLUMNS)} FROM main.connector_blueprints").pl()
     except: 
         print("[NEW] Starting fresh registry.")
 
-    with open(PROJECT_ROOT / "supported_connectors.yaml", "r") as f:
-        manifest = yaml.safe_load(f)
+    # Rows this rebuild cannot reproduce (MD5-era fingerprints, retired shapes) can never
+    # match a tenant table again; drop them so the registry is re-keyed on current hashes
+    purged = 0
+    if existing_blueprints is not None:
+        current_hashes = [h for _c, _o, h in library_tables]
+        kept = existing_blueprints.filter(pl.col("source_schema_hash").is_in(current_hashes))
+        purged = existing_blueprints.height - kept.height
+        if purged:
+            print(f"[PURGE] Dropping {purged} blueprint(s) with fingerprints this library no longer produces")
+        existing_blueprints = kept
+
+    # New registrations accumulate column-wise and become one frame at the end
+    new_blueprints = {col: [] for col in BLUEPRINT_COLUMNS}
+    seen_hashes = set() if existing_blueprints is None else set(existing_blueprints['source_schema_hash'].to_list())
+
+    MASTER_MODELS_DIR.mkdir(parents=True, exist_ok=True)
 
-    for connector_def in manifest['connectors']:
+    for connector_def, obj_id, struct_hash in library_tables:
         source_name = connector_def['name']
-        print(f"[DNA] Mapping DNA for: {source_name}...")
-        
-        dummy_tenant = TenantConfig(slug="library_sample", business_name="Library", sources=SourceRegistry())
-        setattr(dummy_tenant.sources, source_name, SourceConfig(enabled=True))
-        
-        # INCREASED TO 30 DAYS: Ensures high categorical density for DNA established
-        orch = MockOrchestrator(dummy_tenant, days=30, credentials='duckdb' if target in ('sandbox', 'local') else 'motherduck')
-        dlt_schema_dict, _dlt_load_id = orch.run()
-
-        for table_name in dlt_schema_dict.get('tables', {}).keys():
-            prefix = f"raw_library_sample_{source_name}_"
-            if not table_name.startswith(prefix) or "_dlt" in table_name: continue
-            
-            struct_hash = calculate_dlt_schema_hash(dlt_schema_dict, table_name)
-            obj_id = table_name[len(prefix):]
-            master_id = f"{connector_def['master_model_id']}_{obj_id}"
-            
-            if not any(b['source_schema_hash'] == struct_hash for b in existing_blueprints):
-                print(f"[REG] Registering: {struct_hash[:8]} -> platform_mm__{master_id}")
-                existing_blueprints.append({
-                    "source_name": source_name, "source_table_name": obj_id,
-                    "source_schema_hash": struct_hash, "master_model_id": master_id,
-                    "version": connector_def['version'], "registered_at": datetime.now()
-                })
-            ensure_master_model_file(master_id)
-
-    if existing_blueprints:
-        df_blueprints = pl.DataFrame(existing_blueprints)
-        con.sql("CREATE OR REPLACE TABLE main.connector_blueprints AS SELECT * FROM df_blueprints")
+        master_id = f"{connector_def['master_model_id']}_{obj_id}"
+
+        if struct_hash not in seen_hashes:
+            print(f"[REG] Registering: {struct_hash[:8]} -> platform_mm__{master_id}")
+            seen_hashes.add(struct_hash)
+            new_blueprints["source_name"].append(source_name)
+            new_blueprints["source_table_name"].append(obj_id)
+            new_blueprints["source_schema_hash"].append(struct_hash)
+            new_blueprints["master_model_id"].append(master_id)
+            new_blueprints["version"].append(connector_def['version'])
+            new_blueprints["registered_at"].append(datetime.now())
+        ensure_master_model_file(master_id)
+
+    if new_blueprints["source_schema_hash"] or purged:
+        df_blueprints = pl.DataFrame(new_blueprints)
+        if existing_blueprints is not None:
+            df_blueprints = pl.concat([existing_blueprints, df_blueprints], how="vertical_relaxed")
+        # Relational API over the Arrow buffer: no SQL text to format, no view to register
+        con.begin()
+        try:
+            con.sql("DROP TABLE IF EXISTS main.connector_blueprints")
+            con.from_arrow(df_blueprints.to_arrow()).create("connector_blueprints")
+            con.commit()
+        except Exception:
+            con.rollback()
+            raise
     
-    con.close()
+    close_db_connections()
+    run_dbt_registry_update(target)
+
+def run_dbt_registry_update(target='dev'):
+    """Rebuild the master model registry with dbt, in-process rather than via a uv/dbt subprocess."""
+    # Same variables `uv run --env-file ../../.env` used to inject (MOTHERDUCK_TOKEN for profiles.yml)
+    load_dotenv(ENV_FILE)
     dbt_target = 'sandbox' if target in ('sandbox', 'local') else target
-    subprocess.run(f"uv run --env-file ../../.env dbt run --select platform_ops__master_model_registry --target {dbt_target}", cwd=str(PROJECT_ROOT / "warehouse" / "gata_transformation"), check=True, shell=True)
+    res = dbtRunner().invoke([
+        "run", "--select", "platform_ops__master_model_registry", "--target", dbt_target,
+        "--project-dir", str(DBT_PROJECT_DIR), "--profiles-dir", str(DBT_PROJECT_DIR),
+    ])
+    if not res.success:
+        raise RuntimeError(f"dbt registry update failed: {res.exception or 'see dbt log output'}")
 
 if __name__ == "__main__":
     load_connectors_catalog(sys.argv[1] if len(sys.argv) > 1 else 'dev')
@@ -26,23 +26,45 @@ Flow:
 """
 import pathlib
 import argparse
+import copy
+import functools
+import json
+import re
+import string
 import sys
 import subprocess
-import duckdb
+import contextvars
 import os
 import hashlib
 import yaml
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+
+try:
+    from yaml import CSafeLoader as SafeLoader, CSafeDumper as SafeDumper
+except ImportError:  # PyYAML built without libyaml
+    from yaml import SafeLoader, SafeDumper
 
 # --- Path & Service Setup ---
 PROJECT_ROOT = pathlib.Path(__file__).resolve().parent.parent
 DBT_PROJECT_DIR = PROJECT_ROOT / "warehouse" / "gata_transformation"
-MASTER_MODELS_DIR = DBT_PROJECT_DIR / "models" / "platform" / "master_models"
+MODELS_DIR = DBT_PROJECT_DIR / "models"
+MASTER_MODELS_DIR = MODELS_DIR / "platform" / "master_models"
+SELECTORS_YML = DBT_PROJECT_DIR / "selectors.yml"
+DBT_PROJECT_YML = DBT_PROJECT_DIR / "dbt_project.yml"
+SANDBOX_DB_PATH = str(PROJECT_ROOT / "warehouse" / "sandbox.duckdb")
+TENANTS_YAML = PROJECT_ROOT / "tenants.yaml"
+ENV_FILE = PROJECT_ROOT / ".env"
+ONBOARD_STATE_DIR = PROJECT_ROOT / ".cache" / "onboard"
+# YAML inputs are read as bytes (libyaml decodes them) in 64 KiB chunks
+YAML_READ_BUFFER = 1 << 16
 MASTER_MODEL_TEMPLATE = "{{ generate_master_model() }}\n"
 
 sys.path.append(str(PROJECT_ROOT / "services" / "mock-data-engine"))
 
-from orchestrator import MockOrchestrator
-from config import load_manifest
+# orchestrator (dlt) and duckdb are imported by the phases that use them, so
+# reruns that skip those phases and --help never load them
+from config import Manifest
 
 # Standard connector names for table name parsing
 REGISTRY_KEYS = [
@@ -50,9 +72,11 @@ REGISTRY_KEYS = [
     'tiktok_ads', 'instagram_ads', 'shopify', 'woocommerce', 'bigcommerce',
     'amplitude', 'mixpanel', 'google_analytics'
 ]
-
-# Analytics connectors that need conversion_events logic in dbt_project.yml
-ANALYTICS_CONNECTORS = {'google_analytics', 'mixpanel', 'amplitude'}
+# Longest key first so a longer connector name wins over any shorter prefix of it.
+# Unanchored: Pattern.match() anchors at the pos just past the tenant prefix.
+_SOURCE_TABLE_RE = re.compile(
+    r'(' + '|'.join(re.escape(k) for k in sorted(REGISTRY_KEYS, key=len, reverse=True)) + r')_(.+)$'
+)
 
 
 # ═══════════════════════════════════════════════════════════════
@@ -72,35 +96,44 @@ def _fmt_col(col):
     return '{' + ', '.join(parts) + '}'
 
 
-def _macro_model(tenant_slug, source_platform, master_model_id, columns):
-    """Generate a generate_intermediate_unpacker macro call."""
-    col_lines = ',\n'.join(f'        {_fmt_col(c)}' for c in columns)
-    return (
-        f"{{{{ generate_intermediate_unpacker(\n"
-        f"    tenant_slug='{tenant_slug}',\n"
-        f"    source_platform='{source_platform}',\n"
-        f"    master_model_id='{master_model_id}',\n"
-        f"    columns=[\n{col_lines}\n"
-        f"    ]\n"
-        f") }}}}"
-    )
-
-
-def _raw_sql_model(tenant_slug, source_platform, master_model_id, select_body):
-    """Generate a raw SQL intermediate model."""
-    return (
-        f"{{{{ config(materialized='table') }}}}\n\n"
-        f"SELECT\n"
-        f"    tenant_slug,\n"
-        f"    source_platform,\n"
-        f"    tenant_skey,\n"
-        f"    loaded_at,\n\n"
-        f"{select_body}\n\n"
-        f"    raw_data_payload\n\n"
-        f"FROM {{{{ ref('platform_mm__{master_model_id}') }}}}\n"
-        f"WHERE tenant_slug = '{tenant_slug}'\n"
-        f"  AND source_platform = '{source_platform}'"
-    )
+# Model bodies are built once at import and only substituted per model
+_STAGING_PUSHER_TEMPLATE = string.Template(
+    "{{ generate_staging_pusher("
+    "tenant_slug='$tenant_slug', "
+    "source_name='$source_name', "
+    "schema_hash='$schema_hash', "
+    "master_model_id='$master_model_id', "
+    "source_table='$source_table') }}"
+)
+
+_MACRO_MODEL_TEMPLATE = string.Template(
+    "{{ generate_intermediate_unpacker(\n"
+    "    tenant_slug='$tenant_slug',\n"
+    "    source_platform='$source_platform',\n"
+    "    master_model_id='$master_model_id',\n"
+    "    columns=[\n$col_lines\n"
+    "    ]\n"
+    ") }}"
+)
+
+_RAW_SQL_MODEL_TEMPLATE = string.Template(
+    "{{ config(materialized='table') }}\n\n"
+    "SELECT\n"
+    "    tenant_slug,\n"
+    "    source_platform,\n"
+    "    tenant_skey,\n"
+    "    loaded_at,\n\n"
+    "$select_body\n\n"
+    "    raw_data_payload\n\n"
+    "FROM {{ ref('platform_mm__$master_model_id') }}\n"
+    "WHERE tenant_slug = '$tenant_slug'\n"
+    "  AND source_platform = '$source_platform'"
+)
+
+
+def _render_col_block(columns):
+    """Render a column spec list as the indented lines of a columns=[...] argument."""
+    return ',\n'.join(f'        {_fmt_col(c)}' for c in columns)
 
 
 # --- Column specs (shared across connectors) ---
@@ -295,10 +328,50 @@ INTERMEDIATE_SPECS = {
     ],
 }
 
-# Source category sets for semantic config generation
-AD_SOURCES = {'facebook_ads', 'instagram_ads', 'google_ads', 'bing_ads', 'linkedin_ads', 'amazon_ads', 'tiktok_ads'}
-ECOMMERCE_SOURCES = {'shopify', 'bigcommerce', 'woocommerce'}
-ANALYTICS_SOURCES = {'google_analytics', 'mixpanel', 'amplitude'}
+
+@dataclass(slots=True, frozen=True)
+class IntermediateModel:
+    """One prebuilt intermediate model: file suffix + body with only $tenant_slug free."""
+    suffix: str
+    template: string.Template
+
+
+def _prebuild_intermediate_models(specs):
+    """Specialise every spec once: connector -> [IntermediateModel, ...].
+
+    Shared column lists are rendered a single time.
+    """
+    blocks = {}
+    prebuilt = {}
+    for connector, entries in specs.items():
+        prebuilt[connector] = []
+        for suffix, model_type, src_platform, master_model_id, data in entries:
+            if model_type == 'macro':
+                if id(data) not in blocks:
+                    blocks[id(data)] = _render_col_block(data)
+                template, fields = _MACRO_MODEL_TEMPLATE, {'col_lines': blocks[id(data)]}
+            else:
+                template, fields = _RAW_SQL_MODEL_TEMPLATE, {'select_body': data}
+            fields.update(source_platform=src_platform, master_model_id=master_model_id)
+            # '$' in values ('$.field' JSON paths) is escaped so only $tenant_slug stays a placeholder
+            body = template.safe_substitute({k: v.replace('$', '$$') for k, v in fields.items()})
+            prebuilt[connector].append(IntermediateModel(suffix, string.Template(body)))
+    return prebuilt
+
+
+INTERMEDIATE_MODELS = _prebuild_intermediate_models(INTERMEDIATE_SPECS)
+
+# Source category sets for semantic config generation (analytics sources also
+# get conversion_events logic in dbt_project.yml)
+AD_SOURCES = frozenset({'facebook_ads', 'instagram_ads', 'google_ads', 'bing_ads', 'linkedin_ads', 'amazon_ads', 'tiktok_ads'})
+ECOMMERCE_SOURCES = frozenset({'shopify', 'bigcommerce', 'woocommerce'})
+ANALYTICS_SOURCES = frozenset({'google_analytics', 'mixpanel', 'amplitude'})
+# Source -> source_platforms key in the semantic config
+SOURCE_PLATFORM_CATEGORY = {
+    **dict.fromkeys(AD_SOURCES, 'ads'),
+    **dict.fromkeys(ECOMMERCE_SOURCES, 'ecommerce'),
+    **dict.fromkeys(ANALYTICS_SOURCES, 'analytics'),
+}
 
 SEMANTIC_CONFIG_DIR = PROJECT_ROOT / "services" / "platform-api" / "semantic_configs"
 
@@ -317,64 +390,202 @@ ANALYTICS_SHELLS = [
 # UTILITY FUNCTIONS
 # ═══════════════════════════════════════════════════════════════
 
+_env_loaded = False
+# KEY=value lines; the key runs to the first '=', comment lines never match
+_ENV_LINE_RE = re.compile(r'^[ \t]*([^#\s=][^=\r\n]*?)[ \t]*=[ \t]*(.*?)[ \t\r]*$', re.MULTILINE)
+
+
 def load_env_file():
-    env_path = PROJECT_ROOT / ".env"
-    if env_path.exists():
-        with open(env_path, "r") as f:
-            for line in f:
-                line = line.strip()
-                if line and not line.startswith("#") and "=" in line:
-                    key, value = line.split("=", 1)
-                    os.environ.setdefault(key.strip(), value.strip())
+    global _env_loaded
+    if _env_loaded:
+        return
+    _env_loaded = True
+    try:
+        raw = ENV_FILE.read_bytes()
+    except FileNotFoundError:
+        return
+    # One read, one regex pass; the first value for a key wins, as do existing environment variables
+    updates = {}
+    for key, value in _ENV_LINE_RE.findall(raw.decode("utf-8")):
+        updates.setdefault(key, value)
+    os.environ.update({k: v for k, v in updates.items() if k not in os.environ})
+
+
+@functools.lru_cache(maxsize=8)
+def _parse_yaml(path, mtime_ns, size):
+    # mtime_ns and size are only part of the cache key: an edited file re-parses
+    with open(path, 'rb', buffering=YAML_READ_BUFFER) as f:
+        return yaml.load(f, Loader=SafeLoader)
+
+
+def load_yaml_cached(path):
+    """Parsed YAML for path, parsed once per file version. Returns a copy callers may mutate."""
+    st = os.stat(path)
+    return copy.deepcopy(_parse_yaml(str(path), st.st_mtime_ns, st.st_size))
+
+
+@dataclass
+class _OnboardRun:
+    """Connections and filesystem caches for one onboard() call; never shared between runs."""
+    connections: dict = field(default_factory=dict)  # warehouse key -> open connection
+    ensured_master_models: set = field(default_factory=set)
+    existing_files: dict = field(default_factory=dict)  # directory -> names listed in it
+    ensured_dirs: set = field(default_factory=set)
+
+
+_RUN = contextvars.ContextVar("onboard_run")
+
+
+def _current_run():
+    run = _RUN.get(None)
+    if run is None:
+        # Phase functions called outside onboard() get a run of their own
+        run = _OnboardRun()
+        _RUN.set(run)
+    return run
+
+
+class _RunExecutor(ThreadPoolExecutor):
+    """ThreadPoolExecutor whose workers see the submitting thread's run."""
+
+    def submit(self, fn, /, *args, **kwargs):
+        return super().submit(contextvars.copy_context().run, fn, *args, **kwargs)
 
 
 def get_db_connection(target='dev'):
-    if target in ('sandbox', 'local'):
-        return duckdb.connect(str(PROJECT_ROOT / "warehouse" / "sandbox.duckdb"))
-    token = os.environ.get("MOTHERDUCK_TOKEN")
-    return duckdb.connect(f"md:my_db?motherduck_token={token}" if token else "md:my_db")
+    """One open connection per warehouse for the current onboarding run."""
+    connections = _current_run().connections
+    key = 'sandbox' if target in ('sandbox', 'local') else target
+    con = connections.get(key)
+    if con is not None:
+        return con
+    import duckdb
+    if key == 'sandbox':
+        con = duckdb.connect(SANDBOX_DB_PATH)
+    else:
+        token = os.environ.get("MOTHERDUCK_TOKEN")
+        con = duckdb.connect(f"md:my_db?motherduck_token={token}" if token else "md:my_db")
+    connections[key] = con
+    return con
+
+
+def close_db_connections():
+    """Close the run's connections; the sandbox file stays locked to other processes while open."""
+    run = _RUN.get(None)
+    # Nothing to close (and no run to create) outside a run
+    while run is not None and run.connections:
+        _key, con = run.connections.popitem()
+        con.close()
 
 
-def calculate_dlt_schema_hash(dlt_schema: dict, table_name: str) -> str:
-    table_meta = dlt_schema.get('tables', {}).get(table_name, {})
-    columns = table_meta.get('columns', {})
-    sorted_cols = sorted([
-        (n, str(p.get('data_type')))
+def calculate_columns_hash(columns: dict) -> str:
+    """Structural hash of one dlt table's columns dict."""
+    # One pass renders each "name:type" part keyed by column name; ordering by
+    # name (not by the rendered part) keeps signatures identical to the old tuple sort.
+    # The f-string renders a missing data_type as "None", exactly as str() did.
+    parts = {
+        n: f"{n}:{p.get('data_type')}"
         for n, p in columns.items()
         if not n.startswith(("_dlt", "_airbyte"))
-    ])
-    signature = "|".join([f"{c}:{t}" for c, t in sorted_cols])
-    return hashlib.md5(signature.encode('utf-8')).hexdigest()
+    }
+    return _signature_digest("|".join([parts[n] for n in sorted(parts)]))
 
 
-def lookup_master_model(schema_hash: str, target: str = 'dev') -> str:
-    con = get_db_connection(target)
-    try:
-        result = con.sql(
-            f"SELECT master_model_id FROM main.connector_blueprints "
-            f"WHERE source_schema_hash = '{schema_hash}' LIMIT 1"
-        ).fetchone()
-        return result[0] if result else 'unknown'
-    finally:
-        con.close()
+@functools.lru_cache(maxsize=1024)
+def _signature_digest(signature: str) -> str:
+    # Identical column sets (same connector across tables/tenants, and the
+    # scaffolding signature re-fingerprinting every table) hash only once.
+    # 16-byte BLAKE2b keeps the 32-char hex width of the old MD5 fingerprints
+    return hashlib.blake2b(signature.encode('utf-8'), digest_size=16, usedforsecurity=False).hexdigest()
+
+
+def lookup_master_models(schema_hashes, target: str = 'dev') -> dict:
+    """Resolve many schema hashes in one query. Returns {hash: master_model_id}."""
+    if not schema_hashes:
+        return {}
+    rows = get_db_connection(target).execute(
+        "SELECT source_schema_hash, master_model_id FROM main.connector_blueprints "
+        "WHERE source_schema_hash = ANY(?)",
+        [list(schema_hashes)],
+    ).fetchall()
+    return dict(rows)
 
 
 def ensure_master_model_file(master_model_id: str):
-    """Create the dbt master model .sql file if it doesn't already exist."""
-    MASTER_MODELS_DIR.mkdir(parents=True, exist_ok=True)
+    """Create the dbt master model .sql file if it doesn't already exist. MASTER_MODELS_DIR must exist."""
     model_file = MASTER_MODELS_DIR / f"platform_mm__{master_model_id}.sql"
-    if not model_file.exists():
-        model_file.write_text(MASTER_MODEL_TEMPLATE)
+    # Many staging tables share one master model; check each once per run
+    ensured = _current_run().ensured_master_models
+    if master_model_id in ensured:
+        return model_file
+    if _write_if_new(model_file, MASTER_MODEL_TEMPLATE):
         print(f"  [NEW] Created master model: platform_mm__{master_model_id}.sql")
+    ensured.add(master_model_id)
     return model_file
 
 
+def _existing_names(directory):
+    """Names of the files in directory, listed once per run with os.scandir."""
+    existing_files = _current_run().existing_files
+    names = existing_files.get(directory)
+    if names is None:
+        try:
+            with os.scandir(directory) as entries:
+                names = {entry.name for entry in entries}
+        except FileNotFoundError:
+            names = set()
+        existing_files[directory] = names
+    return names
+
+
+def _ensure_dir(directory):
+    """mkdir -p, at most once per directory per run."""
+    ensured = _current_run().ensured_dirs
+    if directory not in ensured:
+        directory.mkdir(parents=True, exist_ok=True)
+        ensured.add(directory)
+
+
 def _write_if_new(filepath, content):
-    """Write file only if it doesn't exist. Returns True if written."""
-    if filepath.exists():
+    """Write file only if it doesn't exist. Returns True if written. The parent dir must exist."""
+    existing = _existing_names(filepath.parent)
+    if filepath.name in existing:
         return False
-    filepath.parent.mkdir(parents=True, exist_ok=True)
-    filepath.write_text(content)
+    # 'xb' is O_CREAT|O_EXCL: the existence check and the create are one atomic open
+    try:
+        with open(filepath, 'xb') as f:
+            f.write(content.encode('utf-8'))
+    except FileExistsError:
+        existing.add(filepath.name)
+        return False
+    existing.add(filepath.name)
+    return True
+
+
+def _write_files_if_new(directory, files):
+    """Write (filename, content) pairs into one directory concurrently.
+
+    Returns the filenames actually written, in input order.
+    """
+    _ensure_dir(directory)
+    _existing_names(directory)  # list the directory before the workers share its cache entry
+    with _RunExecutor(max_workers=16) as pool:
+        written = list(pool.map(lambda fc: _write_if_new(directory / fc[0], fc[1]), files))
+    return [filename for (filename, _content), ok in zip(files, written) if ok]
+
+
+def _write_if_changed(filepath, content):
+    """Write content unless the file already holds exactly these bytes. Returns True if written.
+
+    Leaving unchanged files untouched keeps their mtime, so dbt's partial parse reuses them.
+    """
+    data = content.encode('utf-8')
+    try:
+        if filepath.read_bytes() == data:
+            return False
+    except FileNotFoundError:
+        pass
+    filepath.write_bytes(data)
     return True
 
 
@@ -384,6 +595,7 @@ def _write_if_new(filepath, content):
 
 def generate_mock_data(tenant_config, target, days):
     """Run MockOrchestrator to generate and land data via dlt."""
+    from orchestrator import MockOrchestrator
     credentials = 'duckdb' if target in ('sandbox', 'local') else 'motherduck'
     orchestrator = MockOrchestrator(tenant_config, days=days, credentials=credentials)
     dlt_schema_dict, dlt_load_id = orchestrator.run()
@@ -395,48 +607,90 @@ def generate_mock_data(tenant_config, target, days):
 # PHASE 2a: Create staging scaffolding
 # ═══════════════════════════════════════════════════════════════
 
+# Identifiers SafeDumper writes as plain, unquoted scalars
+_PLAIN_YAML_RE = re.compile(r'[A-Za-z_][A-Za-z0-9_]*')
+_YAML_KEYWORDS = frozenset({'yes', 'no', 'true', 'false', 'on', 'off', 'null'})
+
+
+def _is_plain_yaml(value):
+    return bool(_PLAIN_YAML_RE.fullmatch(value)) and value.lower() not in _YAML_KEYWORDS
+
+
+def _emit_sources_yml(source_name, schema, tables, database=None):
+    """_sources.yml text exactly as yaml.dump(..., default_flow_style=False) lays it out."""
+    lines = ["sources:"]
+    if database:
+        lines.append(f"- database: {database}")
+        lines.append(f"  name: {source_name}")
+    else:
+        lines.append(f"- name: {source_name}")
+    lines.append(f"  schema: {schema}")
+    lines.append("  tables:" if tables else "  tables: []")
+    lines.extend(f"  - name: {t}" for t in tables)
+    lines.append("version: 2\n")
+    return "\n".join(lines)
+
+
 def create_sources_yml(tenant_slug, source_name, tables, target='dev'):
-    src_dir = DBT_PROJECT_DIR / "models" / "sources" / tenant_slug / source_name
-    src_dir.mkdir(parents=True, exist_ok=True)
+    src_dir = MODELS_DIR / "sources" / tenant_slug / source_name
+    _ensure_dir(src_dir)
+    database = None if target in ('sandbox', 'local') else "my_db"
+    if all(map(_is_plain_yaml, (tenant_slug, source_name, *tables))):
+        # Fixed shape of plain identifiers: format the text instead of running the emitter
+        text = _emit_sources_yml(f"{tenant_slug}_{source_name}", tenant_slug, tables, database)
+        _write_if_changed(src_dir / "_sources.yml", text)
+        return
     source_entry = {
         "name": f"{tenant_slug}_{source_name}", "schema": tenant_slug,
         "tables": [{"name": t} for t in tables]
     }
-    if target not in ('sandbox', 'local'):
-        source_entry["database"] = "my_db"
+    if database:
+        source_entry["database"] = database
     source_cfg = {"version": 2, "sources": [source_entry]}
-    with open(src_dir / "_sources.yml", "w") as f:
-        yaml.dump(source_cfg, f, default_flow_style=False)
+    _write_if_changed(src_dir / "_sources.yml", yaml.dump(source_cfg, Dumper=SafeDumper, default_flow_style=False))
 
 
 def create_staging_scaffolding(tenant_slug, target, dlt_schema_dict):
     """Create source YAMLs, staging pushers, and master model files."""
     tenant_prefix = f"raw_{tenant_slug}_"
     processed_sources = {}
+    candidates = []
 
-    for table_name in dlt_schema_dict.get('tables', {}).keys():
-        if not table_name.startswith(tenant_prefix) or "_dlt" in table_name:
-            continue
-
-        remainder = table_name[len(tenant_prefix):]
-        matched_source = None
-        for s in REGISTRY_KEYS:
-            if remainder.startswith(s + "_"):
-                matched_source = s
-                break
+    prefix_len = len(tenant_prefix)
+    # Filter once up front; the dlt schema also carries other tenants' and dlt-internal tables
+    tenant_tables = [
+        (t, meta) for t, meta in dlt_schema_dict.get('tables', {}).items()
+        if t.startswith(tenant_prefix) and "_dlt" not in t
+    ]
 
-        if not matched_source:
+    for table_name, table_meta in tenant_tables:
+        m = _SOURCE_TABLE_RE.match(table_name, prefix_len)
+        if not m:
             continue
-
-        object_name = remainder[len(matched_source) + 1:]
+        matched_source, object_name = m.group(1), m.group(2)
 
         if matched_source not in processed_sources:
             processed_sources[matched_source] = []
         processed_sources[matched_source].append(table_name)
 
-        # Route via connector_blueprints
-        schema_hash = calculate_dlt_schema_hash(dlt_schema_dict, table_name)
-        master_model_id = lookup_master_model(schema_hash, target)
+        schema_hash = calculate_columns_hash(table_meta.get('columns', {}))
+        candidates.append((table_name, matched_source, object_name, schema_hash))
+
+    # Route via connector_blueprints: one round-trip for every table
+    master_models = lookup_master_models({c[3] for c in candidates}, target)
+
+    # Every directory the pass below writes into, created once up front
+    _ensure_dir(MASTER_MODELS_DIR)
+    stg_dirs = {
+        s: MODELS_DIR / "staging" / tenant_slug / s
+        for _t, s, _o, h in candidates if h in master_models
+    }
+    for stg_dir in stg_dirs.values():
+        _ensure_dir(stg_dir)
+
+    stg_files = []
+    for table_name, matched_source, object_name, schema_hash in candidates:
+        master_model_id = master_models.get(schema_hash, 'unknown')
 
         if master_model_id == 'unknown':
             print(f"  [WARN] Hash {schema_hash[:8]} unknown for {table_name}. Skipping.")
@@ -445,24 +699,26 @@ def create_staging_scaffolding(tenant_slug, target, dlt_schema_dict):
         ensure_master_model_file(master_model_id)
 
         # Staging pusher
-        stg_dir = DBT_PROJECT_DIR / "models" / "staging" / tenant_slug / matched_source
-        stg_dir.mkdir(parents=True, exist_ok=True)
         stg_filename = f"stg_{tenant_slug}__{matched_source}_{object_name}.sql"
-        stg_content = (
-            f"{{{{ generate_staging_pusher("
-            f"tenant_slug='{tenant_slug}', "
-            f"source_name='{matched_source}', "
-            f"schema_hash='{schema_hash}', "
-            f"master_model_id='{master_model_id}', "
-            f"source_table='{table_name}') }}}}"
+        stg_content = _STAGING_PUSHER_TEMPLATE.substitute(
+            tenant_slug=tenant_slug, source_name=matched_source, schema_hash=schema_hash,
+            master_model_id=master_model_id, source_table=table_name,
         )
-        with open(stg_dir / stg_filename, "w") as f:
-            f.write(stg_content.strip())
-        print(f"  [OK] Staging: {stg_filename}")
-
-    # Source YAMLs
-    for source_name, tables in processed_sources.items():
-        create_sources_yml(tenant_slug, source_name, tables, target)
+        stg_files.append((stg_dirs[matched_source] / stg_filename, stg_content))
+
+    # Staging pushers are regenerated every run (hash/master id may have moved) but only
+    # rewritten when their content differs; independent files
+    with _RunExecutor(max_workers=16) as pool:
+        # Source YAMLs (one directory per source) share the pool with the pushers
+        source_ymls = [
+            pool.submit(create_sources_yml, tenant_slug, source_name, tables, target)
+            for source_name, tables in processed_sources.items()
+        ]
+        written = list(pool.map(lambda fc: _write_if_changed(*fc), stg_files))
+        for future in source_ymls:
+            future.result()
+    for (stg_path, _content), ok in zip(stg_files, written):
+        print(f"  [{'OK' if ok else 'SKIP'}] Staging: {stg_path.name}")
 
     print(f"  [OK] Staging scaffolding complete ({len(processed_sources)} sources)")
     return processed_sources
@@ -474,26 +730,18 @@ def create_staging_scaffolding(tenant_slug, target, dlt_schema_dict):
 
 def create_intermediate_models(tenant_slug, enabled_sources):
     """Auto-generate intermediate models for each enabled connector."""
-    int_dir = DBT_PROJECT_DIR / "models" / "intermediate" / tenant_slug
-    count = 0
+    int_dir = MODELS_DIR / "intermediate" / tenant_slug
+    files = []
 
     for source in enabled_sources:
-        specs = INTERMEDIATE_SPECS.get(source, [])
-        for spec in specs:
-            suffix, model_type, src_platform, master_model_id, data = spec
-            filename = f"int_{tenant_slug}__{suffix}.sql"
-            filepath = int_dir / filename
+        for model in INTERMEDIATE_MODELS.get(source, ()):
+            files.append((f"int_{tenant_slug}__{model.suffix}.sql", model.template.substitute(tenant_slug=tenant_slug)))
 
-            if model_type == 'macro':
-                content = _macro_model(tenant_slug, src_platform, master_model_id, data)
-            else:
-                content = _raw_sql_model(tenant_slug, src_platform, master_model_id, data)
-
-            if _write_if_new(filepath, content):
-                print(f"  [OK] Intermediate: {filename}")
-                count += 1
+    written = _write_files_if_new(int_dir, files)
+    for filename in written:
+        print(f"  [OK] Intermediate: {filename}")
 
-    print(f"  [OK] Intermediate models complete ({count} created)")
+    print(f"  [OK] Intermediate models complete ({len(written)} created)")
 
 
 # ═══════════════════════════════════════════════════════════════
@@ -502,19 +750,17 @@ def create_intermediate_models(tenant_slug, enabled_sources):
 
 def create_analytics_shells(tenant_slug):
     """Auto-generate the 6 analytics shell models."""
-    analytics_dir = DBT_PROJECT_DIR / "models" / "analytics" / tenant_slug
-    count = 0
-
-    for prefix, subject, factory in ANALYTICS_SHELLS:
-        filename = f"{prefix}_{tenant_slug}__{subject}.sql"
-        content = "{{ " + f"{factory}('{tenant_slug}')" + " }}"
-        filepath = analytics_dir / filename
+    analytics_dir = MODELS_DIR / "analytics" / tenant_slug
+    files = [
+        (f"{prefix}_{tenant_slug}__{subject}.sql", "{{ " + f"{factory}('{tenant_slug}')" + " }}")
+        for prefix, subject, factory in ANALYTICS_SHELLS
+    ]
 
-        if _write_if_new(filepath, content):
-            print(f"  [OK] Analytics: {filename}")
-            count += 1
+    written = _write_files_if_new(analytics_dir, files)
+    for filename in written:
+        print(f"  [OK] Analytics: {filename}")
 
-    print(f"  [OK] Analytics shells complete ({count} created)")
+    print(f"  [OK] Analytics shells complete ({len(written)} created)")
 
 
 # ═══════════════════════════════════════════════════════════════
@@ -681,6 +927,24 @@ def _build_semantic_models(slug: str) -> list[dict]:
     ]
 
 
+def _dump_semantic_yaml(data) -> str:
+    return yaml.dump(data, Dumper=SafeDumper, default_flow_style=False, sort_keys=False, allow_unicode=True)
+
+
+# The models section only varies by slug, which appears solely inside plain
+# fct_/dim_ identifiers, so it is emitted once here and specialised by replace()
+_SEMANTIC_SLUG_PLACEHOLDER = "tenant_slug_placeholder"
+_SEMANTIC_MODELS_YAML = _dump_semantic_yaml({'models': _build_semantic_models(_SEMANTIC_SLUG_PLACEHOLDER)})
+
+
+def _emit_semantic_yaml(tenant: dict) -> str:
+    """Semantic config text, identical to dumping {'tenant': ..., 'models': ...} in one go."""
+    slug = tenant['slug']
+    if not _is_plain_yaml(slug):
+        return _dump_semantic_yaml({'tenant': tenant, 'models': _build_semantic_models(slug)})
+    return _dump_semantic_yaml({'tenant': tenant}) + _SEMANTIC_MODELS_YAML.replace(_SEMANTIC_SLUG_PLACEHOLDER, slug)
+
+
 def generate_semantic_config(tenant_slug: str, enabled_sources: list[str], business_name: str = None):
     """Auto-generate BSL semantic config YAML for the platform API."""
     config_path = SEMANTIC_CONFIG_DIR / f"{tenant_slug}.yaml"
@@ -690,10 +954,9 @@ def generate_semantic_config(tenant_slug: str, enabled_sources: list[str], busin
 
     # Resolve business_name: param > tenants.yaml > slugify fallback
     if not business_name:
-        tenants_path = PROJECT_ROOT / "tenants.yaml"
+        tenants_path = TENANTS_YAML
         if tenants_path.exists():
-            with open(tenants_path) as f:
-                tenants_cfg = yaml.safe_load(f) or {}
+            tenants_cfg = load_yaml_cached(tenants_path) or {}
             for t in tenants_cfg.get('tenants', []):
                 if t.get('slug') == tenant_slug:
                     business_name = t.get('business_name')
@@ -701,29 +964,21 @@ def generate_semantic_config(tenant_slug: str, enabled_sources: list[str], busin
     if not business_name:
         business_name = tenant_slug.replace('_', ' ').title()
 
-    # Classify sources
-    ads = sorted([s for s in enabled_sources if s in AD_SOURCES])
-    ecommerce = sorted([s for s in enabled_sources if s in ECOMMERCE_SOURCES])
-    analytics = sorted([s for s in enabled_sources if s in ANALYTICS_SOURCES])
-
-    slug = tenant_slug
-
-    config = {
-        'tenant': {
-            'slug': slug,
-            'business_name': business_name,
-            'source_platforms': {
-                'ads': ads,
-                'ecommerce': ecommerce,
-                'analytics': analytics,
-            }
-        },
-        'models': _build_semantic_models(slug)
+    # Classify sources in one pass; sorting first keeps each category sorted
+    source_platforms = {'ads': [], 'ecommerce': [], 'analytics': []}
+    for source in sorted(enabled_sources):
+        category = SOURCE_PLATFORM_CATEGORY.get(source)
+        if category:
+            source_platforms[category].append(source)
+
+    tenant = {
+        'slug': tenant_slug,
+        'business_name': business_name,
+        'source_platforms': source_platforms,
     }
 
-    SEMANTIC_CONFIG_DIR.mkdir(parents=True, exist_ok=True)
-    with open(config_path, 'w') as f:
-        yaml.dump(config, f, default_flow_style=False, sort_keys=False, allow_unicode=True)
+    _ensure_dir(SEMANTIC_CONFIG_DIR)
+    config_path.write_bytes(_emit_semantic_yaml(tenant).encode('utf-8'))
     print(f"  [OK] Semantic config: {config_path.name}")
 
 
@@ -731,26 +986,62 @@ def generate_semantic_config(tenant_slug: str, enabled_sources: list[str], busin
 # PHASE 2f: Update selectors.yml with tenant selector
 # ═══════════════════════════════════════════════════════════════
 
+# Tenant selectors are inserted ahead of these
+_OPERATIONAL_SELECTORS = frozenset({'reporting_refresh', 'safe_full_refresh', 'master_models_only'})
+
+
+# A tenant selector as yaml.dump lays it out in selectors.yml
+_SELECTOR_BLOCK = string.Template(
+    "- name: $slug\n"
+    "  definition:\n"
+    "    union:\n"
+    "    - tag: $slug\n"
+    "    - method: fqn\n"
+    "      value: $slug\n"
+)
+_OPERATIONAL_SELECTOR_RE = re.compile(
+    r"^- name: (?:" + "|".join(sorted(_OPERATIONAL_SELECTORS)) + r")\n", re.MULTILINE
+)
+
+
 def update_selectors_yml(tenant_slug: str):
-    """Add tenant selector to selectors.yml if not already present."""
-    selectors_path = DBT_PROJECT_DIR / "selectors.yml"
-    with open(selectors_path) as f:
-        config = yaml.safe_load(f)
+    """Add tenant selector to selectors.yml if not already present.
+
+    The selector is spliced in as text just before the operational selectors; the
+    rest of the file is left byte-for-byte as it was.
+    """
+    selectors_path = SELECTORS_YML
+    text, crlf = _read_text_lf(selectors_path)
+    if text.startswith("selectors:\n") and _is_plain_yaml(tenant_slug):
+        if re.search(rf"^- name: {re.escape(tenant_slug)}$", text, re.MULTILINE):
+            print(f"  [SKIP] Selector for {tenant_slug} already exists")
+            return
+        m = _OPERATIONAL_SELECTOR_RE.search(text)
+        if m:
+            at = m.start()
+        else:
+            # No operational selectors: append, keeping the file newline-terminated
+            text = text if text.endswith("\n") else text + "\n"
+            at = len(text)
+        block = _SELECTOR_BLOCK.substitute(slug=tenant_slug)
+        _write_text_eol(selectors_path, text[:at] + block + text[at:], crlf)
+        print(f"  [OK] Added selector for {tenant_slug}")
+        return
+
+    # Unexpected layout: fall back to a full load + dump of the text already read
+    config = yaml.load(text, Loader=SafeLoader)
+    selectors_list = config['selectors']
 
     # Check if selector already exists
-    existing_names = {s['name'] for s in config.get('selectors', [])}
-    if tenant_slug in existing_names:
+    if any(s['name'] == tenant_slug for s in selectors_list):
         print(f"  [SKIP] Selector for {tenant_slug} already exists")
         return
 
-    # Find the insertion point — before operational selectors
-    selectors_list = config['selectors']
-    OPERATIONAL_SELECTORS = {'reporting_refresh', 'safe_full_refresh', 'master_models_only'}
-    insert_idx = len(selectors_list)
-    for i, sel in enumerate(selectors_list):
-        if sel['name'] in OPERATIONAL_SELECTORS:
-            insert_idx = i
-            break
+    # The insertion point is just before the first operational selector
+    insert_idx = next(
+        (i for i, sel in enumerate(selectors_list) if sel['name'] in _OPERATIONAL_SELECTORS),
+        len(selectors_list),
+    )
 
     new_selector = {
         'name': tenant_slug,
@@ -764,8 +1055,8 @@ def update_selectors_yml(tenant_slug: str):
 
     selectors_list.insert(insert_idx, new_selector)
 
-    with open(selectors_path, 'w') as f:
-        yaml.dump(config, f, default_flow_style=False, sort_keys=False)
+    dumped = yaml.dump(config, Dumper=SafeDumper, default_flow_style=False, sort_keys=False)
+    _write_text_eol(selectors_path, dumped, crlf)
 
     print(f"  [OK] Added selector for {tenant_slug}")
 
@@ -774,17 +1065,51 @@ def update_selectors_yml(tenant_slug: str):
 # PHASE 2d: Update dbt_project.yml tenant_configs
 # ═══════════════════════════════════════════════════════════════
 
-def update_dbt_project_yml(tenant_slug, enabled_sources):
-    """Add tenant to dbt_project.yml tenant_configs if not already present."""
-    yml_path = DBT_PROJECT_DIR / "dbt_project.yml"
-    with open(yml_path) as f:
-        config = yaml.safe_load(f)
+def _read_text_lf(path):
+    """File text with LF line endings, plus whether the file uses CRLF on disk."""
+    raw = path.read_bytes().decode("utf-8")
+    return raw.replace("\r\n", "\n"), "\r\n" in raw
+
+
+def _write_text_eol(path, text, crlf):
+    """Write LF text back with the line endings the file had (CRLF on Windows checkouts)."""
+    path.write_bytes((text.replace("\n", "\r\n") if crlf else text).encode("utf-8"))
+
+
+# The vars.tenant_configs.tenants list as yaml.dump lays it out in dbt_project.yml
+_DBT_TENANTS_KEY = "\n  tenant_configs:\n    tenants:\n"
+_DBT_TENANT_INDENT = "    "
+# yaml.dump puts list items at their parent's indent, so a sibling key under
+# tenant_configs shares the 4-space indent; only items and their bodies continue the list
+_DBT_TENANT_LIST_LINES = (_DBT_TENANT_INDENT + "- ", _DBT_TENANT_INDENT + "  ")
+
+
+def _conversion_events(source_cfg):
+    """conversion_events from the source's table logic in tenants.yaml, defaulting to ['purchase']."""
+    for table in source_cfg.get('tables') or []:
+        events = (table.get('logic') or {}).get('conversion_events')
+        if events:
+            return list(events)
+    return ['purchase']
 
-    tenants_list = config['vars']['tenant_configs']['tenants']
+
+def update_dbt_project_yml(tenant_slug, enabled_sources, sources_dump=None):
+    """Add tenant to dbt_project.yml tenant_configs if not already present.
+
+    sources_dump is the tenant's SourceRegistry.model_dump(); analytics sources
+    carry its conversion_events over, falling back to ['purchase'].
+
+    The new entry is spliced in at the end of the tenants list; the rest of the
+    file is left byte-for-byte as it was, line endings included.
+    """
+    yml_path = DBT_PROJECT_YML
+    # Match and splice on LF text so CRLF checkouts are handled the same way
+    text, crlf = _read_text_lf(yml_path)
+    # A slug yaml.dump would quote can't be matched as plain text; take the full load + dump
+    start = text.find(_DBT_TENANTS_KEY) if _is_plain_yaml(tenant_slug) else -1
 
     # Check if already exists
-    existing = next((t for t in tenants_list if t['slug'] == tenant_slug), None)
-    if existing:
+    if start != -1 and re.search(rf"^{_DBT_TENANT_INDENT}- slug: {re.escape(tenant_slug)}$", text, re.MULTILINE):
         print(f"  [SKIP] {tenant_slug} already in dbt_project.yml")
         return
 
@@ -792,14 +1117,32 @@ def update_dbt_project_yml(tenant_slug, enabled_sources):
     sources_cfg = {}
     for source in enabled_sources:
         entry = {'enabled': True}
-        if source in ANALYTICS_CONNECTORS:
-            entry['logic'] = {'conversion_events': ['purchase']}
+        if source in ANALYTICS_SOURCES:
+            entry['logic'] = {'conversion_events': _conversion_events((sources_dump or {}).get(source, {}))}
         sources_cfg[source] = entry
+    new_tenant = {'slug': tenant_slug, 'sources': sources_cfg}
+
+    if start == -1:
+        # Unexpected layout or quoted slug: fall back to a full load + dump
+        config = yaml.load(text, Loader=SafeLoader)
+        tenants = config['vars']['tenant_configs']['tenants']
+        if any(t.get('slug') == tenant_slug for t in tenants):
+            print(f"  [SKIP] {tenant_slug} already in dbt_project.yml")
+            return
+        tenants.append(new_tenant)
+        dumped = yaml.dump(config, Dumper=SafeDumper, default_flow_style=False, sort_keys=False)
+        _write_text_eol(yml_path, dumped, crlf)
+        print(f"  [OK] Added {tenant_slug} to dbt_project.yml")
+        return
 
-    tenants_list.append({'slug': tenant_slug, 'sources': sources_cfg})
+    # The list ends at the first line that is neither an item nor inside one
+    end = start + len(_DBT_TENANTS_KEY)
+    while end < len(text) and text.startswith(_DBT_TENANT_LIST_LINES, end):
+        end = text.find("\n", end) + 1 or len(text)
 
-    with open(yml_path, 'w') as f:
-        yaml.dump(config, f, default_flow_style=False, sort_keys=False)
+    block = yaml.dump([new_tenant], Dumper=SafeDumper, default_flow_style=False, sort_keys=False)
+    block = "".join(_DBT_TENANT_INDENT + line for line in block.splitlines(keepends=True))
+    _write_text_eol(yml_path, text[:end] + block + text[end:], crlf)
 
     print(f"  [OK] Added {tenant_slug} to dbt_project.yml")
 
@@ -810,6 +1153,8 @@ def update_dbt_project_yml(tenant_slug, enabled_sources):
 
 def run_dbt_pipeline(target='dev', tenant_slug=None):
     """Run dbt pipeline, optionally scoped to a single tenant."""
+    # dbt runs as a subprocess: the platform API calls onboard() from a long-lived
+    # process, and dbt's global flags/logging state don't support in-process reuse
     if os.environ.get("RENDER"):
         dbt_base = ["dbt"]
     else:
@@ -819,21 +1164,21 @@ def run_dbt_pipeline(target='dev', tenant_slug=None):
         dbt_base.append("dbt")
 
     if tenant_slug:
-        # Scoped run: only this tenant's models + shared infrastructure
+        # Scoped run: master model sinks + this tenant's staging pushers. Intermediate,
+        # analytics and ops models only read the master models, so they are built once,
+        # by the reporting refresh below, after every staging MERGE has landed.
         select = [
             "--select",
             "path:models/platform/master_models",
             f"path:models/staging/{tenant_slug}",
-            f"path:models/intermediate/{tenant_slug}",
-            f"path:models/analytics/{tenant_slug}",
-            "path:models/platform/ops",
         ]
         label = f" (tenant: {tenant_slug})"
     else:
         select = []
         label = ""
 
-    # Pipeline run
+    # Pipeline run. dbt inherits stdout, so its log already streams live, and
+    # nothing useful can overlap the wait: Phase 4 may only start once dbt succeeds
     print(f"  [RUN] dbt run --target {target}{label}")
     result = subprocess.run(
         [*dbt_base, "run", "--target", target, *select],
@@ -869,9 +1214,8 @@ def run_dbt_pipeline(target='dev', tenant_slug=None):
 
 def activate_tenant(tenant_slug: str):
     """Set tenant status to 'active' in tenants.yaml."""
-    tenants_path = PROJECT_ROOT / "tenants.yaml"
-    with open(tenants_path) as f:
-        config = yaml.safe_load(f)
+    tenants_path = TENANTS_YAML
+    config = load_yaml_cached(tenants_path)
 
     for tenant in config.get('tenants', []):
         if tenant.get('slug') == tenant_slug:
@@ -885,28 +1229,106 @@ def activate_tenant(tenant_slug: str):
         return
 
     with open(tenants_path, 'w') as f:
-        yaml.dump(config, f, default_flow_style=False, sort_keys=False)
+        yaml.dump(config, f, Dumper=SafeDumper, default_flow_style=False, sort_keys=False)
 
     print(f"  [OK] Status: {tenant_slug} -> active")
 
 
+# ═══════════════════════════════════════════════════════════════
+# ONBOARD STATE (skip Phases 1 and 2 on unchanged reruns)
+# ═══════════════════════════════════════════════════════════════
+
+def mock_data_fingerprint(tenant_config, target, days):
+    """Fingerprint the Phase 1 inputs: the tenant's tenants.yaml entry, target and days."""
+    return hashlib.blake2b(json.dumps(
+        [target, days, tenant_config.model_dump(mode='json')], sort_keys=True,
+    ).encode('utf-8'), digest_size=16, usedforsecurity=False).hexdigest()
+
+
+def scaffolding_signature(tenant_config, target, dlt_schema_dict):
+    """Fingerprint everything Phase 2 output depends on.
+
+    Covers this script (specs + templates), the target, the tenant's tenants.yaml
+    entry, the name + structural hash of each of the tenant's raw tables and the
+    master model connector_blueprints routes each hash to. A library rebuild that
+    starts (or stops) recognising a hash therefore re-runs the scaffolding.
+    """
+    tenant_prefix = f"raw_{tenant_config.slug}_"
+    tables = sorted(
+        (t, calculate_columns_hash(meta.get('columns', {})))
+        for t, meta in dlt_schema_dict.get('tables', {}).items()
+        if t.startswith(tenant_prefix) and "_dlt" not in t
+    )
+    routes = sorted(lookup_master_models({sh for _t, sh in tables}, target).items())
+    h = hashlib.blake2b(digest_size=16, usedforsecurity=False)
+    h.update(pathlib.Path(__file__).read_bytes())
+    h.update(json.dumps(
+        [target, tenant_config.model_dump(mode='json'), tables, routes], sort_keys=True,
+    ).encode('utf-8'))
+    return h.hexdigest()
+
+
+def read_onboard_state(tenant_slug):
+    try:
+        return json.loads((ONBOARD_STATE_DIR / f"{tenant_slug}.json").read_bytes())
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def raw_tables_landed(tenant_slug, target, dlt_schema_dict):
+    """True when every raw table the last load recorded for the tenant exists in the warehouse."""
+    # Don't let the check create an empty sandbox file
+    if target in ('sandbox', 'local') and not os.path.exists(SANDBOX_DB_PATH):
+        return False
+    expected = {
+        t for t in dlt_schema_dict.get('tables', {})
+        if t.startswith(f"raw_{tenant_slug}_") and "_dlt" not in t
+    }
+    # dlt lands the tenant's tables in a dataset (schema) named after the slug
+    rows = get_db_connection(target).execute(
+        "SELECT table_name FROM information_schema.tables WHERE table_schema = ?", [tenant_slug]
+    ).fetchall()
+    return expected <= {name for (name,) in rows}
+
+
+def write_onboard_state(tenant_slug, **fields):
+    """Merge fields into the tenant's state file."""
+    state = read_onboard_state(tenant_slug)
+    state.update(fields)
+    _ensure_dir(ONBOARD_STATE_DIR)
+    (ONBOARD_STATE_DIR / f"{tenant_slug}.json").write_bytes(json.dumps(state).encode('utf-8'))
+
+
 # ═══════════════════════════════════════════════════════════════
 # MAIN
 # ═══════════════════════════════════════════════════════════════
 
-def onboard(tenant_slug, target='dev', days=30, skip_dbt=False):
+def onboard(tenant_slug, target='dev', days=30, skip_dbt=False, force=False):
     """Single entry point for tenant onboarding."""
+    # Each call gets its own connections and caches, so concurrent onboardings
+    # (platform API background tasks) never share or close each other's
+    token = _RUN.set(_OnboardRun())
+    try:
+        return _onboard(tenant_slug, target, days, skip_dbt, force)
+    finally:
+        close_db_connections()
+        _RUN.reset(token)
+
+
+def _onboard(tenant_slug, target, days, skip_dbt, force):
     load_env_file()
 
-    manifest = load_manifest(str(PROJECT_ROOT / "tenants.yaml"))
+    # Same cached parse that Phases 2e and 4 read tenants.yaml through
+    manifest = Manifest(**load_yaml_cached(TENANTS_YAML))
     tenant_config = next((t for t in manifest.tenants if t.slug == tenant_slug), None)
     if not tenant_config:
         print(f"[ERR] Tenant '{tenant_slug}' not found in tenants.yaml")
         return 1
 
     # Resolve enabled sources from tenant config (SourceRegistry is a Pydantic model)
+    sources_dump = tenant_config.sources.model_dump()
     enabled_sources = [
-        name for name, cfg in tenant_config.sources.model_dump().items()
+        name for name, cfg in sources_dump.items()
         if cfg.get('enabled', False)
     ]
 
@@ -914,31 +1336,54 @@ def onboard(tenant_slug, target='dev', days=30, skip_dbt=False):
     print(f"\n{'='*60}")
     print(f"  PHASE 1: Generate mock data for {tenant_slug}")
     print(f"{'='*60}")
-    dlt_schema_dict, _load_id = generate_mock_data(tenant_config, target, days)
+    state = read_onboard_state(tenant_slug)
+    data_fingerprint = mock_data_fingerprint(tenant_config, target, days)
+    # The state file only says what was loaded; a deleted sandbox file or dropped
+    # MotherDuck schema means the data is gone, so check the warehouse itself
+    if (not force and state.get('mock_data') == data_fingerprint and 'dlt_schema' in state
+            and raw_tables_landed(tenant_slug, target, state['dlt_schema'])):
+        print("  [SKIP] Mock data already landed (use --force to regenerate)")
+        dlt_schema_dict = state['dlt_schema']
+    else:
+        # dlt opens the warehouse itself; don't hold the sandbox file open across its load
+        close_db_connections()
+        dlt_schema_dict, _load_id = generate_mock_data(tenant_config, target, days)
+        write_onboard_state(tenant_slug, mock_data=data_fingerprint, dlt_schema=dlt_schema_dict)
 
     # Phase 2: dbt scaffolding
     print(f"\n{'='*60}")
     print(f"  PHASE 2: Create dbt scaffolding")
     print(f"{'='*60}")
 
-    # 2a: Sources, staging pushers, master models
-    create_staging_scaffolding(tenant_slug, target, dlt_schema_dict)
-
-    # 2b: Intermediate models (JSON extraction)
-    create_intermediate_models(tenant_slug, enabled_sources)
-
-    # 2c: Analytics shell models (factory one-liners)
-    create_analytics_shells(tenant_slug)
-
-    # 2d: Update dbt_project.yml
-    update_dbt_project_yml(tenant_slug, enabled_sources)
-
-    # 2e: BSL semantic config YAML
-    generate_semantic_config(tenant_slug, enabled_sources,
-                             business_name=tenant_config.business_name)
+    signature = scaffolding_signature(tenant_config, target, dlt_schema_dict)
+    if (not force and signature == state.get('signature')
+            and (MODELS_DIR / "staging" / tenant_slug).is_dir()):
+        print("  [SKIP] Scaffolding up-to-date (use --force to regenerate)")
+    else:
+        # 2a: Sources, staging pushers, master models
+        create_staging_scaffolding(tenant_slug, target, dlt_schema_dict)
+
+        # 2b: Intermediate models (JSON extraction)
+        create_intermediate_models(tenant_slug, enabled_sources)
+
+        # 2c: Analytics shell models (factory one-liners)
+        create_analytics_shells(tenant_slug)
+
+        # 2d-2f touch disjoint files and share no state, so they run side by side
+        with _RunExecutor(max_workers=3) as pool:
+            config_steps = [
+                # 2d: Update dbt_project.yml
+                pool.submit(update_dbt_project_yml, tenant_slug, enabled_sources, sources_dump),
+                # 2e: BSL semantic config YAML
+                pool.submit(generate_semantic_config, tenant_slug, enabled_sources,
+                            business_name=tenant_config.business_name),
+                # 2f: Update selectors.yml
+                pool.submit(update_selectors_yml, tenant_slug),
+            ]
+            for step in config_steps:
+                step.result()
 
-    # 2f: Update selectors.yml
-    update_selectors_yml(tenant_slug)
+        write_onboard_state(tenant_slug, signature=signature)
 
     # Phase 3: dbt pipeline
     if skip_dbt:
@@ -948,6 +1393,7 @@ def onboard(tenant_slug, target='dev', days=30, skip_dbt=False):
     print(f"\n{'='*60}")
     print(f"  PHASE 3: Run dbt pipeline (target={target})")
     print(f"{'='*60}")
+    close_db_connections()
     exit_code = run_dbt_pipeline(target, tenant_slug=tenant_slug)
 
     # Phase 4: Activate tenant on success
@@ -966,5 +1412,6 @@ if __name__ == "__main__":
     parser.add_argument("--target", default="dev", choices=["dev", "sandbox", "local"])
     parser.add_argument("--days", type=int, default=180)
     parser.add_argument("--skip-dbt", action="store_true", help="Skip dbt runs after scaffolding")
+    parser.add_argument("--force", action="store_true", help="Regenerate mock data and scaffolding even if inputs are unchanged")
     args = parser.parse_args()
-    sys.exit(onboard(args.tenant_slug, args.target, args.days, args.skip_dbt))
+    sys.exit(onboard(args.tenant_slug, args.target, args.days, args.skip_dbt, args.force))
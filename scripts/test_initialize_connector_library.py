@@ -0,0 +1,112 @@
+import pytest
+import duckdb
+import yaml
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import initialize_connector_library as library
+
+
+# --- Fingerprint Tests ---
+
+def test_calculate_dlt_schema_hashes_ignores_dlt_tables_and_columns():
+    """Verifies fingerprints cover only physical columns and types, in any column order."""
+    schema = {
+        "tables": {
+            "raw_library_sample_shopify_orders": {"columns": {
+                "id": {"data_type": "bigint"},
+                "total": {"data_type": "double"},
+                "_dlt_id": {"data_type": "text"},
+            }},
+            "raw_library_sample_shopify_products": {"columns": {
+                "total": {"data_type": "double"},
+                "id": {"data_type": "bigint"},
+            }},
+            "_dlt_loads": {"columns": {"load_id": {"data_type": "text"}}},
+        }
+    }
+
+    hashes = library.calculate_dlt_schema_hashes(schema)
+
+    assert set(hashes) == {"raw_library_sample_shopify_orders", "raw_library_sample_shopify_products"}
+    assert hashes["raw_library_sample_shopify_orders"] == hashes["raw_library_sample_shopify_products"]
+    assert len(hashes["raw_library_sample_shopify_orders"]) == 32
+
+
+# --- Registry Rebuild Tests ---
+
+CONNECTORS = {
+    "connectors": [
+        {"name": "shopify", "version": "2024-01", "master_model_id": "shopify_api_v1"},
+    ]
+}
+ORDERS_COLUMNS = {"id": {"data_type": "bigint"}}
+PRODUCTS_COLUMNS = {"id": {"data_type": "bigint"}, "title": {"data_type": "text"}}
+
+
+@pytest.fixture
+def sandbox_library(tmp_path, monkeypatch):
+    """Points the library build at a temp sandbox and manifest, fingerprinting canned schemas in threads."""
+    manifest = tmp_path / "supported_connectors.yaml"
+    manifest.write_text(yaml.dump(CONNECTORS))
+    db_path = str(tmp_path / "sandbox.duckdb")
+    monkeypatch.setattr("initialize_connector_library.SUPPORTED_CONNECTORS_YAML", manifest)
+    monkeypatch.setattr("initialize_connector_library.SANDBOX_DB_PATH", db_path)
+    monkeypatch.setattr("initialize_connector_library.MASTER_MODELS_DIR", tmp_path / "master_models")
+    monkeypatch.setattr("initialize_connector_library._ENSURED_MASTER_MODELS", set())
+    monkeypatch.setattr("initialize_connector_library.ProcessPoolExecutor", ThreadPoolExecutor)
+    monkeypatch.setattr("initialize_connector_library.run_dbt_registry_update", lambda target: None)
+    monkeypatch.setattr(
+        "initialize_connector_library.map_connector_dna",
+        lambda connector_def, credentials: library.calculate_dlt_schema_hashes({"tables": {
+            "raw_library_sample_shopify_orders": {"columns": ORDERS_COLUMNS},
+            "raw_library_sample_shopify_products": {"columns": PRODUCTS_COLUMNS},
+        }}),
+    )
+    return db_path
+
+
+def _blueprints(db_path):
+    con = duckdb.connect(db_path)
+    try:
+        return con.sql(
+            "SELECT source_schema_hash, master_model_id, registered_at FROM main.connector_blueprints"
+        ).fetchall()
+    finally:
+        con.close()
+
+
+def test_load_connectors_catalog_purges_stale_blueprints(sandbox_library):
+    """Verifies rows the library no longer fingerprints (e.g. MD5-era) are dropped and current ones kept."""
+    orders_hash = library.calculate_columns_hash(ORDERS_COLUMNS)
+    products_hash = library.calculate_columns_hash(PRODUCTS_COLUMNS)
+    registered_at = datetime(2024, 1, 1)
+    con = duckdb.connect(sandbox_library)
+    con.sql(
+        "CREATE TABLE main.connector_blueprints (source_name VARCHAR, source_table_name VARCHAR, "
+        "source_schema_hash VARCHAR, master_model_id VARCHAR, version VARCHAR, registered_at TIMESTAMP)"
+    )
+    con.execute(
+        "INSERT INTO main.connector_blueprints VALUES (?, ?, ?, ?, ?, ?), (?, ?, ?, ?, ?, ?)",
+        ["shopify", "orders", "0cc175b9c0f1b6a831c399e269772661", "shopify_api_v1_orders", "2023-01", registered_at,
+         "shopify", "orders", orders_hash, "shopify_api_v1_orders", "2024-01", registered_at],
+    )
+    con.close()
+
+    library.load_connectors_catalog("sandbox")
+
+    rows = {h: (master_id, at) for h, master_id, at in _blueprints(sandbox_library)}
+    assert set(rows) == {orders_hash, products_hash}
+    assert rows[orders_hash] == ("shopify_api_v1_orders", registered_at)
+    assert rows[products_hash][0] == "shopify_api_v1_products"
+
+
+def test_load_connectors_catalog_is_idempotent(sandbox_library):
+    """Verifies rebuilding an up-to-date library leaves the registry unchanged."""
+    library.load_connectors_catalog("sandbox")
+    first = sorted(_blueprints(sandbox_library))
+
+    library.load_connectors_catalog("sandbox")
+
+    assert sorted(_blueprints(sandbox_library)) == first
+    assert len(first) == 2
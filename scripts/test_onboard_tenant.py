@@ -0,0 +1,355 @@
+import pytest
+import os
+import yaml
+
+import onboard_tenant
+
+
+def _eol(text, crlf):
+    return text.replace("\n", "\r\n") if crlf else text
+
+
+def _dump(data):
+    return yaml.dump(data, default_flow_style=False, sort_keys=False)
+
+
+# --- .env Parsing Tests ---
+
+def _reference_env(text):
+    """The plain line-by-line parser the regex replaced."""
+    parsed = {}
+    for line in text.splitlines():
+        line = line.strip()
+        if line and not line.startswith("#") and "=" in line:
+            key, value = line.split("=", 1)
+            parsed.setdefault(key.strip(), value.strip())
+    return parsed
+
+
+ENV_TEXT = (
+    "# MotherDuck\n"
+    "MOTHERDUCK_TOKEN=abc123\n"
+    "  SPACED_KEY  =  spaced value  \n"
+    "\n"
+    "URL=postgres://u:p@host/db?sslmode=require\n"
+    "EMPTY=\n"
+    "DUPLICATE=first\n"
+    "DUPLICATE=second\n"
+    "#COMMENTED=out\n"
+    "no equals sign here\n"
+    "LAST=no trailing newline"
+)
+
+
+@pytest.mark.parametrize("crlf", [False, True])
+def test_load_env_file_matches_line_parser(tmp_path, monkeypatch, crlf):
+    """Verifies the single-pass regex parses .env files like a line-by-line split, CRLF included."""
+    env_file = tmp_path / ".env"
+    env_file.write_bytes(_eol(ENV_TEXT, crlf).encode("utf-8"))
+    expected = _reference_env(ENV_TEXT)
+    for key in expected:
+        monkeypatch.delenv(key, raising=False)
+    monkeypatch.setattr("onboard_tenant.ENV_FILE", env_file)
+    monkeypatch.setattr("onboard_tenant._env_loaded", False)
+
+    onboard_tenant.load_env_file()
+
+    assert {key: os.environ[key] for key in expected} == expected
+    assert os.environ["DUPLICATE"] == "first"
+    assert not any("\r" in os.environ[key] for key in expected)
+
+
+def test_load_env_file_keeps_existing_environment(tmp_path, monkeypatch):
+    """Verifies variables already set in the environment win over .env values."""
+    env_file = tmp_path / ".env"
+    env_file.write_text("MOTHERDUCK_TOKEN=from_file\n")
+    monkeypatch.setenv("MOTHERDUCK_TOKEN", "from_env")
+    monkeypatch.setattr("onboard_tenant.ENV_FILE", env_file)
+    monkeypatch.setattr("onboard_tenant._env_loaded", False)
+
+    onboard_tenant.load_env_file()
+
+    assert os.environ["MOTHERDUCK_TOKEN"] == "from_env"
+
+
+# --- dbt_project.yml Tests ---
+
+DBT_PROJECT = {
+    "name": "gata_transformation",
+    "version": "1.0.0",
+    "vars": {
+        "tenant_configs": {
+            "tenants": [
+                {"slug": "tyrell_corp", "sources": {"facebook_ads": {"enabled": True}}},
+            ]
+        }
+    },
+    "models": {"gata_transformation": {"+materialized": "view"}},
+}
+
+NEW_DBT_TENANT = {
+    "slug": "acme",
+    "sources": {
+        "facebook_ads": {"enabled": True},
+        "google_analytics": {"enabled": True, "logic": {"conversion_events": ["sign_up"]}},
+    },
+}
+
+
+def _add_acme():
+    onboard_tenant.update_dbt_project_yml(
+        "acme", ["facebook_ads", "google_analytics"],
+        {"google_analytics": {"tables": [{"name": "events", "logic": {"conversion_events": ["sign_up"]}}]}},
+    )
+
+
+@pytest.fixture
+def dbt_project_yml(tmp_path, monkeypatch):
+    """Points the script at a temporary dbt_project.yml laid out as yaml.dump writes it."""
+    path = tmp_path / "dbt_project.yml"
+    monkeypatch.setattr("onboard_tenant.DBT_PROJECT_YML", path)
+    return path
+
+
+@pytest.mark.parametrize("crlf", [False, True])
+def test_update_dbt_project_yml_matches_yaml_dump(dbt_project_yml, crlf):
+    """Verifies the spliced entry is byte-identical to a full load + dump, line endings preserved."""
+    dbt_project_yml.write_bytes(_eol(_dump(DBT_PROJECT), crlf).encode("utf-8"))
+
+    _add_acme()
+
+    expected = yaml.safe_load(_dump(DBT_PROJECT))
+    expected["vars"]["tenant_configs"]["tenants"].append(NEW_DBT_TENANT)
+    assert dbt_project_yml.read_bytes().decode("utf-8") == _eol(_dump(expected), crlf)
+
+
+@pytest.mark.parametrize("crlf", [False, True])
+def test_update_dbt_project_yml_skips_existing_tenant(dbt_project_yml, crlf):
+    """Verifies re-onboarding an existing tenant leaves the file untouched."""
+    original = _eol(_dump(DBT_PROJECT), crlf).encode("utf-8")
+    dbt_project_yml.write_bytes(original)
+
+    onboard_tenant.update_dbt_project_yml("tyrell_corp", ["facebook_ads"])
+
+    assert dbt_project_yml.read_bytes() == original
+
+
+@pytest.mark.parametrize("crlf", [False, True])
+def test_update_dbt_project_yml_fallback_layout(dbt_project_yml, crlf):
+    """Verifies a file the splice can't handle is loaded and dumped, adding each tenant once."""
+    original = _eol(yaml.dump(DBT_PROJECT, default_flow_style=False, sort_keys=False, indent=4), crlf)
+    dbt_project_yml.write_bytes(original.encode("utf-8"))
+
+    onboard_tenant.update_dbt_project_yml("tyrell_corp", ["facebook_ads"])
+    assert dbt_project_yml.read_bytes() == original.encode("utf-8")
+
+    _add_acme()
+    _add_acme()
+
+    raw = dbt_project_yml.read_bytes().decode("utf-8")
+    tenants = yaml.safe_load(raw)["vars"]["tenant_configs"]["tenants"]
+    assert [t["slug"] for t in tenants] == ["tyrell_corp", "acme"]
+    assert tenants[1] == NEW_DBT_TENANT
+    assert ("\r\n" in raw) == crlf
+
+
+def test_update_dbt_project_yml_stops_at_sibling_key(dbt_project_yml):
+    """Verifies the entry goes inside the tenants list, not after a key that follows it."""
+    project = yaml.safe_load(_dump(DBT_PROJECT))
+    project["vars"]["tenant_configs"]["defaults"] = {"conversion_events": ["purchase"]}
+    dbt_project_yml.write_text(_dump(project))
+
+    _add_acme()
+
+    project["vars"]["tenant_configs"]["tenants"].append(NEW_DBT_TENANT)
+    assert dbt_project_yml.read_text() == _dump(project)
+
+
+def test_update_dbt_project_yml_quoted_slug_added_once(dbt_project_yml):
+    """Verifies a slug yaml.dump quotes is recognised on rerun instead of appended again."""
+    dbt_project_yml.write_text(_dump(DBT_PROJECT))
+
+    onboard_tenant.update_dbt_project_yml("yes", ["facebook_ads"])
+    onboard_tenant.update_dbt_project_yml("yes", ["facebook_ads"])
+
+    tenants = yaml.safe_load(dbt_project_yml.read_text())["vars"]["tenant_configs"]["tenants"]
+    assert [t["slug"] for t in tenants] == ["tyrell_corp", "yes"]
+
+
+# --- selectors.yml Tests ---
+
+def _selector(slug):
+    return {"name": slug, "definition": {"union": [{"tag": slug}, {"method": "fqn", "value": slug}]}}
+
+
+SELECTORS = {
+    "selectors": [
+        _selector("tyrell_corp"),
+        {"name": "reporting_refresh", "definition": {"method": "tag", "value": "reporting"}},
+        {"name": "master_models_only", "definition": {"method": "path", "value": "models/platform"}},
+    ]
+}
+
+
+@pytest.fixture
+def selectors_yml(tmp_path, monkeypatch):
+    """Points the script at a temporary selectors.yml."""
+    path = tmp_path / "selectors.yml"
+    monkeypatch.setattr("onboard_tenant.SELECTORS_YML", path)
+    return path
+
+
+@pytest.mark.parametrize("crlf", [False, True])
+def test_update_selectors_yml_matches_yaml_dump(selectors_yml, crlf):
+    """Verifies the tenant selector lands ahead of the operational ones, byte-identical to a dump."""
+    selectors_yml.write_bytes(_eol(_dump(SELECTORS), crlf).encode("utf-8"))
+
+    onboard_tenant.update_selectors_yml("acme")
+
+    expected = yaml.safe_load(_dump(SELECTORS))
+    expected["selectors"].insert(1, _selector("acme"))
+    assert selectors_yml.read_bytes().decode("utf-8") == _eol(_dump(expected), crlf)
+
+
+@pytest.mark.parametrize("crlf", [False, True])
+def test_update_selectors_yml_skips_existing_tenant(selectors_yml, crlf):
+    """Verifies an existing tenant selector is not added twice."""
+    original = _eol(_dump(SELECTORS), crlf).encode("utf-8")
+    selectors_yml.write_bytes(original)
+
+    onboard_tenant.update_selectors_yml("tyrell_corp")
+
+    assert selectors_yml.read_bytes() == original
+
+
+@pytest.mark.parametrize("crlf", [False, True])
+def test_update_selectors_yml_fallback_layout(selectors_yml, crlf):
+    """Verifies a file the splice can't handle still gets the selector once, before the operational ones."""
+    original = _eol("# dbt selectors\n" + _dump(SELECTORS), crlf)
+    selectors_yml.write_bytes(original.encode("utf-8"))
+
+    onboard_tenant.update_selectors_yml("acme")
+    onboard_tenant.update_selectors_yml("acme")
+
+    raw = selectors_yml.read_bytes().decode("utf-8")
+    names = [s["name"] for s in yaml.safe_load(raw)["selectors"]]
+    assert names == ["tyrell_corp", "acme", "reporting_refresh", "master_models_only"]
+    assert ("\r\n" in raw) == crlf
+
+
+# --- _sources.yml Tests ---
+
+@pytest.mark.parametrize("database", [None, "my_db"])
+@pytest.mark.parametrize("tables", [
+    [],
+    ["raw_acme_facebook_ads_campaigns"],
+    ["raw_acme_shopify_orders", "raw_acme_shopify_products", "raw_acme_shopify_customers"],
+])
+def test_emit_sources_yml_matches_yaml_dump(database, tables):
+    """Verifies the formatted _sources.yml is exactly what yaml.dump produces."""
+    source_entry = {"name": "acme_shopify", "schema": "acme", "tables": [{"name": t} for t in tables]}
+    if database:
+        source_entry["database"] = database
+    expected = yaml.dump({"version": 2, "sources": [source_entry]}, default_flow_style=False)
+
+    text = onboard_tenant._emit_sources_yml("acme_shopify", "acme", tables, database)
+
+    assert text == expected
+    assert yaml.safe_load(text) == {"version": 2, "sources": [source_entry]}
+
+
+@pytest.mark.parametrize("value, plain", [
+    ("acme", True), ("gata_swamp", True), ("_private", True),
+    ("yes", False), ("On", False), ("null", False), ("1st", False), ("a-b", False), ("", False),
+])
+def test_is_plain_yaml(value, plain):
+    """Verifies only identifiers yaml.dump leaves unquoted take the formatted fast path."""
+    assert onboard_tenant._is_plain_yaml(value) is plain
+    if plain:
+        assert yaml.dump(value).startswith(value + "\n")
+
+
+# --- Onboard State (Rerun Skip) Tests ---
+
+TENANTS = {
+    "tenants": [
+        {"slug": "acme", "business_name": "Acme", "sources": {"facebook_ads": {"enabled": True}}},
+    ]
+}
+
+DLT_SCHEMA = {
+    "tables": {
+        "raw_acme_facebook_ads_campaigns": {
+            "columns": {"id": {"data_type": "text"}, "_dlt_id": {"data_type": "text"}},
+        },
+        "_dlt_loads": {"columns": {}},
+    }
+}
+
+
+@pytest.fixture
+def onboarding(tmp_path, monkeypatch):
+    """Runs onboard() against temp paths with the warehouse and every phase body replaced by recorders."""
+    tenants_yaml = tmp_path / "tenants.yaml"
+    tenants_yaml.write_text(_dump(TENANTS))
+    monkeypatch.setattr("onboard_tenant.TENANTS_YAML", tenants_yaml)
+    monkeypatch.setattr("onboard_tenant.ONBOARD_STATE_DIR", tmp_path / ".cache" / "onboard")
+    monkeypatch.setattr("onboard_tenant.MODELS_DIR", tmp_path / "models")
+    monkeypatch.setattr("onboard_tenant._env_loaded", True)
+
+    calls = []
+    warehouse = {"landed": True, "routes": {}}
+
+    def generate_mock_data(tenant_config, target, days):
+        calls.append("mock_data")
+        return DLT_SCHEMA, "load_1"
+
+    def create_staging_scaffolding(tenant_slug, target, dlt_schema_dict):
+        calls.append("scaffolding")
+        (tmp_path / "models" / "staging" / tenant_slug).mkdir(parents=True, exist_ok=True)
+
+    monkeypatch.setattr("onboard_tenant.generate_mock_data", generate_mock_data)
+    monkeypatch.setattr("onboard_tenant.raw_tables_landed", lambda *args: warehouse["landed"])
+    monkeypatch.setattr("onboard_tenant.lookup_master_models", lambda hashes, target: dict(warehouse["routes"]))
+    monkeypatch.setattr("onboard_tenant.create_staging_scaffolding", create_staging_scaffolding)
+    for step in ("create_intermediate_models", "create_analytics_shells", "update_dbt_project_yml",
+                 "generate_semantic_config", "update_selectors_yml"):
+        monkeypatch.setattr(f"onboard_tenant.{step}", lambda *args, **kwargs: None)
+
+    def run(**kwargs):
+        calls.clear()
+        assert onboard_tenant.onboard("acme", target="sandbox", days=30, skip_dbt=True, **kwargs) == 0
+        return list(calls)
+
+    run.warehouse = warehouse
+    return run
+
+
+def test_onboard_rerun_skips_unchanged_phases(onboarding):
+    """Verifies a second run with identical inputs regenerates nothing."""
+    assert onboarding() == ["mock_data", "scaffolding"]
+    assert onboarding() == []
+
+
+def test_onboard_regenerates_when_raw_tables_are_gone(onboarding):
+    """Verifies the state file alone never skips Phase 1 when the warehouse lost the tables."""
+    onboarding()
+    onboarding.warehouse["landed"] = False
+    assert onboarding() == ["mock_data"]
+
+
+def test_onboard_rescaffolds_after_library_rebuild(onboarding):
+    """Verifies a hash that starts resolving in connector_blueprints re-runs Phase 2 only."""
+    onboarding()
+    schema_hash = onboard_tenant.calculate_columns_hash(
+        DLT_SCHEMA["tables"]["raw_acme_facebook_ads_campaigns"]["columns"]
+    )
+    onboarding.warehouse["routes"] = {schema_hash: "facebook_ads_api_v1_campaigns"}
+    assert onboarding() == ["scaffolding"]
+    assert onboarding() == []
+
+
+def test_onboard_force_reruns_everything(onboarding):
+    """Verifies --force ignores the recorded state."""
+    onboarding()
+    assert onboarding(force=True) == ["mock_data", "scaffolding"]
@@ -4,6 +4,11 @@ from pydantic import BaseModel, Field
 from typing import List, Dict, Optional, Any
 from pathlib import Path
 
+try:
+    from yaml import CSafeLoader as SafeLoader
+except ImportError:  # PyYAML built without libyaml
+    from yaml import SafeLoader
+
 class FunnelConfig(BaseModel):
     """
     Funnel probability means — set per-tenant in tenants.yaml.
@@ -113,4 +118,4 @@ class Manifest(BaseModel):
 
 def load_manifest(path: str = 'tenants.yaml') -> Manifest:
     with open(path, 'r') as f:
-        return Manifest(**yaml.safe_load(f))
+        return Manifest(**yaml.load(f, Loader=SafeLoader))
@@ -27,6 +27,7 @@ emerge naturally from the probability mechanics — they are NOT pre-assigned.
 """
 import dlt
 import polars as pl
+import importlib
 import random
 import uuid
 from datetime import datetime, timedelta, date
@@ -39,17 +40,9 @@ from sources.digital_analytics.shared_config import (
     pick_weighted,
 )
 
-# --- Generator Imports (unchanged) ---
-from sources.paid_ads.facebook_ads.fb_ads_data_generator import generate_facebook_data
-from sources.paid_ads.google_ads.google_ads_data_generator import generate_google_ads
-from sources.paid_ads.tiktok_ads.tiktok_ads_data_generator import generate_tiktok_data
-from sources.paid_ads.instagram_ads.ig_ads_data_generator import generate_instagram_data
-from sources.paid_ads.linkedin_ads.linkedin_ads_data_generator import generate_linkedin_data
-from sources.paid_ads.bing_ads.bing_ads_data_generator import generate_bing_data
-from sources.paid_ads.amazon_ads.amazon_ads_data_generator import generate_amazon_data
-from sources.ecommerce_platforms.shopify.shopify_data_generator import generate_shopify_data
-from sources.ecommerce_platforms.woocommerce.woocommerce_data_generator import generate_woocommerce_data
-from sources.ecommerce_platforms.bigcommerce.bigcommerce_data_generator import generate_bigcommerce_data
+# --- Generator Registry (imported on first use, only for enabled sources) ---
+def _load_generator(module_path: str, func_name: str):
+    return getattr(importlib.import_module(module_path), func_name)
 
 
 # ═══════════════════════════════════════════════════════════════
@@ -57,14 +50,24 @@ from sources.ecommerce_platforms.bigcommerce.bigcommerce_data_generator import g
 # ═══════════════════════════════════════════════════════════════
 
 class MockOrchestrator:
-    def __init__(self, config: Any, days: int = 90, credentials: str = None):
-        """Initializes with a default 90-day window for categorical density."""
+    def __init__(self, config: Any, days: int = 90, credentials: str = None, pipelines_dir: str = None):
+        """Initializes with a default 90-day window for categorical density.
+
+        pipelines_dir overrides dlt's working directory, so runs sharing a
+        tenant slug (and so a pipeline name) can proceed side by side.
+        """
         self.config = config
         self.days = days
         self.credentials = credentials
+        self.pipelines_dir = pipelines_dir
+
+    def run(self, schema_only: bool = False) -> Dict[str, Any]:
+        """
+        Orchestrates data generation via simulation, then loads via dlt.
 
-    def run(self) -> Dict[str, Any]:
-        """Orchestrates data generation via simulation, then loads via dlt."""
+        With schema_only=True the package is extracted and normalized so the
+        dlt schema is fully inferred, but nothing is written to the destination.
+        """
 
         # ── dlt pipeline setup (unchanged) ──
         is_local = self.credentials and 'duckdb' in self.credentials
@@ -79,6 +82,7 @@ class MockOrchestrator:
             pipeline_name=f'mock_load_{self.config.slug}',
             destination=destination,
             dataset_name=self.config.slug,
+            pipelines_dir=self.pipelines_dir,
         )
 
         load_package = []
@@ -156,8 +160,17 @@ class MockOrchestrator:
             for table_name, rows in mp_tables.items():
                 load_package.append(create_table_etl('mixpanel', table_name, rows))
 
-        # ── Atomic dlt load ──
+        # ── Schema inference only: no tables are materialized ──
         dlt_load_id = "manual_run"
+        if schema_only:
+            if load_package:
+                pipeline.extract(load_package)
+                pipeline.normalize()
+                # Discard the normalized package so a later run doesn't load it
+                pipeline.drop_pending_packages()
+            return pipeline.default_schema.to_dict(), dlt_load_id
+
+        # ── Atomic dlt load ──
         if load_package:
             info = pipeline.run(load_package)
             if info.loads_ids:
@@ -172,13 +185,19 @@ class MockOrchestrator:
 # ═══════════════════════════════════════════════════════════════
 
 _AD_GENERATORS = {
-    "facebook_ads":  ("facebook_ads",  generate_facebook_data),
-    "google_ads":    ("google_ads",    generate_google_ads),
-    "instagram_ads": ("instagram_ads", generate_instagram_data),
-    "linkedin_ads":  ("linkedin_ads",  generate_linkedin_data),
-    "bing_ads":      ("bing_ads",      generate_bing_data),
-    "tiktok_ads":    ("tiktok_ads",    generate_tiktok_data),
-    "amazon_ads":    ("amazon_ads",    generate_amazon_data),
+    "facebook_ads":  ("facebook_ads",  "sources.paid_ads.facebook_ads.fb_ads_data_generator",        "generate_facebook_data"),
+    "google_ads":    ("google_ads",    "sources.paid_ads.google_ads.google_ads_data_generator",      "generate_google_ads"),
+    "instagram_ads": ("instagram_ads", "sources.paid_ads.instagram_ads.ig_ads_data_generator",       "generate_instagram_data"),
+    "linkedin_ads":  ("linkedin_ads",  "sources.paid_ads.linkedin_ads.linkedin_ads_data_generator",  "generate_linkedin_data"),
+    "bing_ads":      ("bing_ads",      "sources.paid_ads.bing_ads.bing_ads_data_generator",          "generate_bing_data"),
+    "tiktok_ads":    ("tiktok_ads",    "sources.paid_ads.tiktok_ads.tiktok_ads_data_generator",      "generate_tiktok_data"),
+    "amazon_ads":    ("amazon_ads",    "sources.paid_ads.amazon_ads.amazon_ads_data_generator",      "generate_amazon_data"),
+}
+
+_ECOMMERCE_GENERATORS = {
+    "shopify":     ("sources.ecommerce_platforms.shopify.shopify_data_generator",         "generate_shopify_data"),
+    "woocommerce": ("sources.ecommerce_platforms.woocommerce.woocommerce_data_generator", "generate_woocommerce_data"),
+    "bigcommerce": ("sources.ecommerce_platforms.bigcommerce.bigcommerce_data_generator", "generate_bigcommerce_data"),
 }
 
 # Source/medium mapping for each ad platform
@@ -212,9 +231,12 @@ def _run_ad_generators(
     ad_outputs = {}
     campaign_pool: Dict[str, List[str]] = {}
 
-    for platform_name, (attr_name, gen_func) in _AD_GENERATORS.items():
+    # Generators draw from the shared seeded Faker/random state, so they run one
+    # after another in a fixed order to keep the output reproducible
+    for platform_name, (attr_name, module_path, func_name) in _AD_GENERATORS.items():
         source_cfg = getattr(sources, attr_name, None)
         if source_cfg and source_cfg.enabled:
+            gen_func = _load_generator(module_path, func_name)
             raw = gen_func(slug, source_cfg.generation, days)
             ad_outputs[platform_name] = raw
 
@@ -239,13 +261,10 @@ def _run_ecommerce_for_products(
     Returns (platform_name, products_list).
     Orders will be replaced by simulation output.
     """
-    ecom_map = {
-        "shopify":      (sources.shopify,      generate_shopify_data),
-        "woocommerce":  (sources.woocommerce,  generate_woocommerce_data),
-        "bigcommerce":  (sources.bigcommerce,  generate_bigcommerce_data),
-    }
-    for platform_name, (source_cfg, gen_func) in ecom_map.items():
+    for platform_name, (module_path, func_name) in _ECOMMERCE_GENERATORS.items():
+        source_cfg = getattr(sources, platform_name)
         if source_cfg.enabled:
+            gen_func = _load_generator(module_path, func_name)
             raw = gen_func(slug, source_cfg.generation, days)
             products = raw.get("products", [])
             return platform_name, products
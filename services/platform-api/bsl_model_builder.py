@@ -28,6 +28,11 @@ from typing import Optional
 
 import ibis
 
+try:
+    from yaml import CSafeLoader as SafeLoader
+except ImportError:  # PyYAML built without libyaml
+    from yaml import SafeLoader
+
 logger = logging.getLogger(__name__)
 
 # BSL imports
@@ -631,7 +636,7 @@ def _load_yaml_enrichments(tenant_slug: str) -> dict:
         return {}
 
     with open(config_path) as f:
-        raw = yaml.safe_load(f) or {}
+        raw = yaml.load(f, Loader=SafeLoader) or {}
 
     enrichments = {}
     for model_cfg in raw.get("models", []):
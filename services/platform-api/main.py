@@ -34,6 +34,11 @@ import subprocess
 import logging
 from pathlib import Path
 
+try:
+    from yaml import CSafeLoader as SafeLoader, CSafeDumper as SafeDumper
+except ImportError:  # PyYAML built without libyaml
+    from yaml import SafeLoader, SafeDumper
+
 from models import (
     SemanticQueryRequest, SemanticQueryResponse, ColumnInfo,
     ModelSummary, ModelDetail,
@@ -86,7 +91,7 @@ def _get_query_builder(tenant_slug: str) -> QueryBuilder:
     config_path = Path(__file__).parent / "semantic_configs" / f"{tenant_slug}.yaml"
     if config_path.exists():
         with open(config_path) as f:
-            config = yaml.safe_load(f)
+            config = yaml.load(f, Loader=SafeLoader)
 
         # Merge auto-count measures from metadata into YAML config so that
         # model detail and QueryBuilder stay in sync.
@@ -264,7 +269,7 @@ def check_readiness(tenant_slug: str):
         # Check tenants.yaml to determine if tenant is registered
         if TENANTS_YAML.exists():
             with open(TENANTS_YAML) as f:
-                tenants_cfg = yaml.safe_load(f) or {}
+                tenants_cfg = yaml.load(f, Loader=SafeLoader) or {}
             for t in tenants_cfg.get("tenants", []):
                 if t.get("slug") == tenant_slug:
                     tenant_status = t.get("status", "unknown")
@@ -325,7 +330,7 @@ async def onboard_tenant(request: OnboardRequest, background_tasks: BackgroundTa
     # 1. Update tenants.yaml with the new tenant
     tenants_path = _Path(__file__).parent.parent.parent / "tenants.yaml"
     with open(tenants_path) as f:
-        config = yaml.safe_load(f) or {"tenants": []}
+        config = yaml.load(f, Loader=SafeLoader) or {"tenants": []}
 
     existing = next((t for t in config["tenants"] if t["slug"] == tenant_slug), None)
     if existing:
@@ -342,7 +347,7 @@ async def onboard_tenant(request: OnboardRequest, background_tasks: BackgroundTa
         logger.info(f"[ONBOARD] Registered new tenant: {tenant_slug}")
 
     with open(tenants_path, "w") as f:
-        yaml.dump(config, f, default_flow_style=False, sort_keys=False)
+        yaml.dump(config, f, Dumper=SafeDumper, default_flow_style=False, sort_keys=False)
 
     # 2. Launch onboarding pipeline in background
     project_root = _Path(__file__).parent.parent.parent
@@ -535,7 +540,7 @@ def get_semantic_config(tenant_slug: str):
     if not config_path.exists():
         return {"models": [], "_note": "No YAML override config — using auto-generated catalog"}
     with open(config_path) as f:
-        return yaml.safe_load(f)
+        return yaml.load(f, Loader=SafeLoader)
 
 
 @app.post("/semantic-layer/update")
@@ -544,7 +549,7 @@ async def update_logic(tenant_slug: str, platform: str, logic_payload: dict):
     if os.environ.get("RENDER"):
         raise HTTPException(501, "Use the dbt pipeline for production updates")
     with open(TENANTS_YAML, "r") as f:
-        config = yaml.safe_load(f)
+        config = yaml.load(f, Loader=SafeLoader)
 
     for tenant in config.get("tenants", []):
         if tenant["slug"] == tenant_slug:
@@ -555,7 +560,7 @@ async def update_logic(tenant_slug: str, platform: str, logic_payload: dict):
             break
 
     with open(TENANTS_YAML, "w") as f:
-        yaml.safe_dump(config, f)
+        yaml.dump(config, f, Dumper=SafeDumper)
 
     try:
         project_root = Path(__file__).parent.parent.parent